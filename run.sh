@@ -19,7 +19,7 @@ for cmd in python3 python; do
         ver=$("$cmd" --version 2>&1 | awk '{print $2}')
         major=$(echo "$ver" | cut -d. -f1)
         minor=$(echo "$ver" | cut -d. -f2)
-        if [ "$major" -ge 3 ] && [ "$minor" -ge 10 ]; then
+        if [ "$major" -ge 3 ] && [ "$minor" -ge 11 ]; then
             PYTHON="$cmd"
             echo "  Python found: $ver ($cmd)"
             break
@@ -28,7 +28,7 @@ for cmd in python3 python; do
 done
 
 if [ -z "$PYTHON" ]; then
-    echo "  [ERROR] Python 3.10+ is required but not found."
+    echo "  [ERROR] Python 3.11+ is required but not found."
     echo ""
     echo "  Install Python:"
     echo "    macOS:  brew install python3"
@@ -29,11 +29,14 @@ import hashlib
 import json
 import math
 import os
+import pickle
 import random
 import re
 import shutil
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import repeat
 from pathlib import Path
 from urllib.parse import quote, urljoin, urlparse
 
@@ -49,14 +52,37 @@ try:
     )
 except ImportError:
     MISSING.append("playwright")
+try:
+    import aiohttp
+except ImportError:
+    MISSING.append("aiohttp")
 try:
     import fitz  # PyMuPDF
 except ImportError:
     MISSING.append("pymupdf")
 try:
-    from datasketch import MinHash, MinHashLSH
+    from datasketch import LeanMinHash, MinHash, MinHashLSH
 except ImportError:
     MISSING.append("datasketch")
+# Optional: rensa computes MinHash signatures in Rust (10-40x faster than
+# datasketch's per-hash Python loop).  Fall back to datasketch if absent.
+try:
+    from rensa import RMinHash, RMinHashLSH
+    HAVE_RENSA = True
+except ImportError:
+    HAVE_RENSA = False
+# Optional: xxHash is 5-20x faster than MD5 for deriving filenames from URLs.
+try:
+    import xxhash
+    HAVE_XXHASH = True
+except ImportError:
+    HAVE_XXHASH = False
+# Optional: BLAKE3 hashes at multi-GB/s for exact-duplicate PDF detection.
+try:
+    import blake3
+    HAVE_BLAKE3 = True
+except ImportError:
+    HAVE_BLAKE3 = False
 if MISSING:
     print(f"Missing packages: {', '.join(MISSING)}")
     print(f"  pip install {' '.join(MISSING)}")
@@ -72,6 +98,12 @@ MAX_RETRIES = 3
 PAGE_LIMIT_DEFAULT = 9999  # effectively unlimited
 CONCURRENT_DOWNLOADS = 4   # parallel download slots
 DOWNLOAD_TIMEOUT = 300_000  # 5 minutes per file (some are 100MB+)
+# (bands, rows) hand-tuned for the default 0.95 threshold at 128 perms —
+# a sharper S-curve than datasketch's auto-pick, which optimizes for ~0.8.
+LSH_PARAMS_DEFAULT = (32, 4)
+# Docs below this many tokens yield noisy MinHash signatures that flood the
+# LSH with false-positive candidates; they still get exact-hash dedupe.
+MIN_TOKENS_DEFAULT = 200
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:124.0) Gecko/20100101 Firefox/124.0",
@@ -101,11 +133,25 @@ async def _adelay(lo: float = 0.4, hi: float = 1.2) -> None:
     await asyncio.sleep(random.uniform(lo, hi))
 
 
+def _write_json_atomic(path: Path, data: dict) -> None:
+    """Write JSON via a temp file + rename so a crash never truncates state."""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def _content_hasher():
+    """Streaming hasher for exact-duplicate PDF detection (BLAKE3 if present)."""
+    return blake3.blake3() if HAVE_BLAKE3 else hashlib.blake2b(digest_size=16)
+
+
 def _safe_filename(url: str) -> str:
     """Derive a filesystem-safe filename from a URL."""
     name = os.path.basename(urlparse(url).path)
     if name and name.lower().endswith(".pdf"):
         return re.sub(r'[<>:"/\\|?*]', "_", name)
+    if HAVE_XXHASH:
+        return xxhash.xxh3_64_hexdigest(url.encode()) + ".pdf"
     return hashlib.md5(url.encode()).hexdigest()[:16] + ".pdf"
 
 
@@ -119,16 +165,14 @@ class BrowserSession:
         self.browser: Browser | None = None
         self.ctx: BrowserContext | None = None
         self.page: Page | None = None
+        self.user_agent: str = random.choice(USER_AGENTS)
 
     async def start(self) -> Page:
         self._pw = await async_playwright().start()
         for engine in ("firefox", "chromium"):
             try:
                 launcher = getattr(self._pw, engine)
-                self.browser = await launcher.launch(
-                    headless=self.headless,
-                    slow_mo=40,
-                )
+                self.browser = await launcher.launch(headless=self.headless)
                 print(f"  [browser] {engine} ({'headless' if self.headless else 'headed'})")
                 break
             except Exception as exc:
@@ -137,7 +181,7 @@ class BrowserSession:
             raise RuntimeError("No browser available. Run: playwright install firefox")
 
         self.ctx = await self.browser.new_context(
-            user_agent=random.choice(USER_AGENTS),
+            user_agent=self.user_agent,
             viewport={"width": 1440, "height": 900},
             locale="en-US",
             timezone_id="America/New_York",
@@ -228,22 +272,20 @@ class EpsteinScraper:
         self.max_pages = max_pages
 
     async def _api_fetch(self, query: str, page: int) -> dict | None:
-        """Fetch one page of API results via the browser context (uses cookies)."""
+        """Fetch one page of API results with the browser's cookies.
+
+        page.request talks HTTP directly from the Playwright process — no JS
+        closure in the renderer and no JSON marshalled back over CDP.
+        """
         url = f"{API_URL}?keys={quote(query)}&page={page}"
         for attempt in range(1, MAX_RETRIES + 1):
             try:
-                data = await self.s.page.evaluate(f"""
-                    async () => {{
-                        const r = await fetch({json.dumps(url)});
-                        if (!r.ok) return {{ error: r.status }};
-                        return await r.json();
-                    }}
-                """)
-                if isinstance(data, dict) and "error" in data:
-                    print(f"    API HTTP {data['error']} page={page} attempt={attempt}")
+                resp = await self.s.page.request.get(url)
+                if not resp.ok:
+                    print(f"    API HTTP {resp.status} page={page} attempt={attempt}")
                     await _adelay(2, 4)
                     continue
-                return data
+                return await resp.json()
             except Exception as exc:
                 print(f"    API error page={page} attempt={attempt}: {exc}")
                 await _adelay(2, 4)
@@ -299,108 +341,394 @@ class EpsteinScraper:
                 target.add(uri)
 
     async def download(self, urls: list[str], dest: Path) -> tuple[int, int, int]:
-        """Download PDFs with concurrency. Returns (downloaded, skipped, failed)."""
+        """Download PDFs with concurrency. Returns (downloaded, skipped, failed).
+
+        Uses aiohttp with the browser's cookies so 100MB+ PDFs stream to disk
+        in 64KB chunks instead of being buffered whole in memory.  The
+        Playwright session is only needed to establish the age-gate cookies.
+        """
         dest.mkdir(parents=True, exist_ok=True)
-        dl, sk, fa = 0, 0, 0
         sem = asyncio.Semaphore(CONCURRENT_DOWNLOADS)
-
-        async def _dl_one(url: str) -> str:
-            """Returns 'dl', 'skip', or 'fail'."""
+        cookies = {c["name"]: c["value"] for c in await self.s.ctx.cookies()}
+        timeout = aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT / 1000)
+        # One readdir up front beats a stat syscall per URL when resuming
+        # runs with thousands of already-downloaded files.
+        existing = {p.name: p.stat().st_size for p in dest.iterdir() if p.is_file()}
+        # Byte-identical PDFs under different URLs are common in DOJ
+        # re-releases — hash while streaming and keep only the first copy.
+        hash_path = dest.parent / "pdf_hashes.json"
+        hash_state = json.loads(hash_path.read_text()) if hash_path.exists() else {}
+        hashes: dict[str, str] = hash_state.get("hashes", {})
+        aliases: dict[str, str] = hash_state.get("aliases", {})
+
+        # Distinct URLs can collapse to the same filename; dispatch only the
+        # first of each so two concurrent tasks never stream interleaved
+        # chunks into the same .part file.
+        by_name: dict[str, str] = {}
+        for u in urls:
+            by_name.setdefault(_safe_filename(u), u)
+        if len(by_name) < len(urls):
+            print(f"    {len(urls) - len(by_name)} URLs share a filename with "
+                  f"an earlier one — keeping first of each")
+        urls = list(by_name.values())
+
+        async def _dl_one(http: aiohttp.ClientSession, url: str) -> str:
+            """Returns 'dl', 'skip', 'dup', or 'fail'."""
             fname = _safe_filename(url)
             out = dest / fname
-            if out.exists() and out.stat().st_size > 500:
+            if existing.get(fname, 0) > 500:
                 return "skip"
+            if fname in aliases:
+                return "dup"
+            tmp = out.with_suffix(".part")
 
             async with sem:
                 for attempt in range(1, MAX_RETRIES + 1):
                     try:
-                        resp = await self.s.page.request.get(url, timeout=DOWNLOAD_TIMEOUT)
-                        if resp.ok:
-                            data = await resp.body()
-                            if len(data) > 500:
-                                out.write_bytes(data)
-                                return "dl"
+                        async with http.get(url) as resp:
+                            if resp.status == 200:
+                                size = 0
+                                hasher = _content_hasher()
+                                with open(tmp, "wb") as fh:
+                                    async for chunk in resp.content.iter_chunked(1 << 16):
+                                        fh.write(chunk)
+                                        hasher.update(chunk)
+                                        size += len(chunk)
+                                if size > 500:
+                                    h = hasher.hexdigest()
+                                    first = hashes.get(h)
+                                    if first and first != fname:
+                                        tmp.unlink(missing_ok=True)
+                                        aliases[fname] = first
+                                        return "dup"
+                                    hashes[h] = fname
+                                    tmp.replace(out)
+                                    return "dl"
+                                tmp.unlink(missing_ok=True)
+                                print(f"    tiny response for {fname} ({size}B)")
                             else:
-                                print(f"    tiny response for {fname} ({len(data)}B)")
-                        else:
-                            print(f"    HTTP {resp.status} for {fname} (attempt {attempt})")
+                                print(f"    HTTP {resp.status} for {fname} (attempt {attempt})")
                     except Exception as exc:
+                        tmp.unlink(missing_ok=True)
                         print(f"    err {fname} (attempt {attempt}): {exc}")
                     await _adelay(1.0, 2.5)
             return "fail"
 
-        # Process in batches to give progress updates
-        batch_size = 25
-        for start in range(0, len(urls), batch_size):
-            batch = urls[start : start + batch_size]
-            results = await asyncio.gather(*[_dl_one(u) for u in batch])
-            for r in results:
-                if r == "dl":
-                    dl += 1
-                elif r == "skip":
-                    sk += 1
-                else:
-                    fa += 1
-            done = min(start + batch_size, len(urls))
-            print(f"    [{done}/{len(urls)}] dl={dl}  skip={sk}  fail={fa}")
-            # Brief pause between batches
-            if done < len(urls):
-                await _adelay(0.2, 0.6)
-
-        return dl, sk, fa
+        # One task per URL; the semaphore alone caps in-flight requests, so a
+        # slow 100MB file never stalls the other download slots the way the
+        # old fixed-size batches did.
+        counts = {"dl": 0, "skip": 0, "dup": 0, "fail": 0}
+        done = 0
+
+        async def _tracked(http: aiohttp.ClientSession, url: str) -> None:
+            nonlocal done
+            counts[await _dl_one(http, url)] += 1
+            done += 1
+            if done % 25 == 0 or done == len(urls):
+                print(f"    [{done}/{len(urls)}] dl={counts['dl']}  "
+                      f"skip={counts['skip']}  dup={counts['dup']}  "
+                      f"fail={counts['fail']}")
+
+        async with aiohttp.ClientSession(
+            cookies=cookies,
+            headers={"User-Agent": self.s.user_agent},
+            timeout=timeout,
+        ) as http:
+            async with asyncio.TaskGroup() as tg:
+                for u in urls:
+                    tg.create_task(_tracked(http, u))
+
+        _write_json_atomic(hash_path, {"hashes": hashes, "aliases": aliases})
+        # Byte-identical dupes count as skips for the caller's stats.
+        return counts["dl"], counts["skip"] + counts["dup"], counts["fail"]
 
 
 # ── text extraction ──────────────────────────────────────────────────────────
+def _hash_pdf(p: Path) -> str:
+    """Content hash of a PDF (first 4MB — enough to distinguish re-downloads)."""
+    with open(p, "rb") as fh:
+        return hashlib.sha1(fh.read(4 * 1024 * 1024)).hexdigest()
+
+
+def _init_extract_worker() -> None:
+    """Pool initializer: pay the PyMuPDF import once per worker (matters under
+    spawn) and silence MuPDF's per-page stderr chatter on damaged scans."""
+    import fitz  # noqa: F401
+
+    fitz.TOOLS.mupdf_display_errors(False)
+
+
+def _extract_one(pdf_path: str) -> tuple[str, str]:
+    """Extract one PDF's text (runs in a worker process). Returns (status, text).
+
+    Workers return the text rather than writing it so the parent can serialize
+    all .txt writes — many processes creating small files in one directory
+    contend on the directory inode on some filesystems.
+    """
+    try:
+        # filetype="pdf" skips filetype sniffing; plain-text mode with minimal
+        # flags skips image/graphics handling that contributes no text —
+        # a big win on graphics-heavy exhibit scans.
+        doc = fitz.open(pdf_path, filetype="pdf")
+        text = "\n".join(
+            page.get_text("text", flags=fitz.TEXT_PRESERVE_WHITESPACE) for page in doc
+        )
+        doc.close()
+        if text.strip():
+            return "ok", text
+        return "fail", ""
+    except Exception:
+        return "fail", ""
+
+
 def extract_texts(pdf_dir: Path, txt_dir: Path) -> tuple[int, int]:
     txt_dir.mkdir(parents=True, exist_ok=True)
     ok, fail = 0, 0
     pdfs = sorted(pdf_dir.glob("*.pdf"))
-    for i, p in enumerate(pdfs, 1):
+
+    # Skip-if-extracted is keyed on PDF content hash, not filename, so a
+    # re-downloaded PDF with different bytes gets re-extracted.  Each hash
+    # maps to a list of output names — byte-identical PDFs can sit on disk
+    # under several filenames.  (Older caches stored a single name.)
+    cache_path = txt_dir.parent / "extraction_cache.json"
+    cache: dict[str, list[str]] = {}
+    if cache_path.exists():
+        for k, v in json.loads(cache_path.read_text()).items():
+            cache[k] = [v] if isinstance(v, str) else v
+
+    # Deduplication moves dupe texts into removed_duplicates/ — those still
+    # count as extracted, otherwise every deduped PDF is re-extracted forever.
+    removed_dir = txt_dir / "removed_duplicates"
+    todo: list[tuple[str, str, str]] = []
+    for p in pdfs:
         out = txt_dir / (p.stem + ".txt")
-        if out.exists() and out.stat().st_size > 0:
-            ok += 1
-            continue
         try:
-            doc = fitz.open(p)
-            text = "\n".join(page.get_text() for page in doc)
-            doc.close()
-            if text.strip():
-                out.write_text(text, encoding="utf-8")
+            h = _hash_pdf(p)
+        except Exception:
+            fail += 1
+            continue
+        if out.name in cache.get(h, ()) and (
+            (out.exists() and out.stat().st_size > 0)
+            or (removed_dir / out.name).exists()
+        ):
+            ok += 1
+        else:
+            todo.append((str(p), str(out), h))
+
+    if not todo:
+        print(f"    [{len(pdfs)}/{len(pdfs)}] ok={ok}  fail={fail}")
+        return ok, fail
+
+    # PyMuPDF extraction is CPU-bound (content-stream parsing, font shaping)
+    # and per-PDF independent — fan out across all cores.
+    done = 0
+    with ProcessPoolExecutor(
+        max_workers=os.cpu_count(), initializer=_init_extract_worker
+    ) as pool:
+        futures = {pool.submit(_extract_one, src): (dst, h) for src, dst, h in todo}
+        for fut in as_completed(futures):
+            status, text = fut.result()
+            if status == "ok":
+                dst, h = futures[fut]
+                Path(dst).write_text(text, encoding="utf-8")
                 ok += 1
+                names = cache.setdefault(h, [])
+                if Path(dst).name not in names:
+                    names.append(Path(dst).name)
             else:
                 fail += 1
-        except Exception:
-            fail += 1
-        if i % 100 == 0 or i == len(pdfs):
-            print(f"    [{i}/{len(pdfs)}] ok={ok}  fail={fail}")
+            done += 1
+            if done % 100 == 0 or done == len(todo):
+                print(f"    [{done}/{len(todo)}] ok={ok}  fail={fail}")
+
+    _write_json_atomic(cache_path, cache)
     return ok, fail
 
 
 # ── deduplication ────────────────────────────────────────────────────────────
-def deduplicate(txt_dir: Path, threshold: float = 0.95, num_perm: int = 128) -> tuple[int, int]:
+_TOK_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text: str) -> list[str]:
+    """Lowercased alphanumeric tokens — whitespace splitting kept punctuation
+    glued to words, letting OCR noise perturb the shingle hashes."""
+    return _TOK_RE.findall(text.lower())
+
+
+def _trigrams(words: list[str]) -> list[str]:
+    """Word-trigram shingles for MinHash."""
+    return [f"{a} {b} {c}" for a, b, c in zip(words, words[1:], words[2:])]
+
+
+def _minhash_one(
+    path: str, num_perm: int, min_tokens: int
+) -> tuple[str, str | None, bytes | None]:
+    """Compute a datasketch MinHash for one text file (worker process).
+
+    Returns (path, text sha1, LeanMinHash bytes) — lean signatures drop the
+    permutation state, so they are cheap to pickle back and small to hold in
+    the LSH.  Docs under min_tokens return a sha1 but no signature (exact
+    dedupe only); unreadable files return (path, None, None).
+    """
+    try:
+        text = Path(path).read_text(encoding="utf-8", errors="ignore")
+        if not text.strip():
+            return path, None, None
+        h = hashlib.sha1(text.encode()).hexdigest()
+        words = _tokens(text)
+        if len(words) < min_tokens:
+            return path, h, None
+        m = MinHash(num_perm=num_perm)
+        m.update_batch([t.encode() for t in _trigrams(words)])
+        lean = LeanMinHash(m)
+        buf = bytearray(lean.bytesize())
+        lean.serialize(buf)
+        return path, h, bytes(buf)
+    except Exception:
+        return path, None, None
+
+
+def _lsh_has_any_candidate(lsh: MinHashLSH, m: LeanMinHash) -> bool:
+    """True if any LSH band bucket already holds a candidate for `m`.
+
+    Same band walk as MinHashLSH.query, but we only care *whether* a
+    near-duplicate exists, so short-circuit on the first non-empty bucket
+    instead of materializing the full candidate list.
+    """
+    for (start, end), table in zip(lsh.hashranges, lsh.hashtables):
+        if table.get(lsh._H(m.hashvalues[start:end])):
+            return True
+    return False
+
+
+def deduplicate(
+    txt_dir: Path,
+    threshold: float = 0.95,
+    num_perm: int = 128,
+    lsh_params: tuple[int, int] = LSH_PARAMS_DEFAULT,
+    min_tokens: int = MIN_TOKENS_DEFAULT,
+) -> tuple[int, int]:
+    bands, rows = lsh_params
     dupes_dir = txt_dir / "removed_duplicates"
     dupes_dir.mkdir(parents=True, exist_ok=True)
-    lsh = MinHashLSH(threshold=threshold, num_perm=num_perm)
-    files = sorted(txt_dir.glob("*.txt"))
+    all_files = sorted(txt_dir.glob("*.txt"))
     dupes: list[Path] = []
 
-    for i, f in enumerate(files, 1):
+    # Persist the LSH between runs so resumed corpora only hash new files.
+    # The cache is invalidated whenever the parameters (or MinHash engine)
+    # that shaped the index change.
+    cache_path = txt_dir.parent / "lsh_cache.pkl"
+    cache_key = {
+        "engine": "rensa" if HAVE_RENSA else "datasketch",
+        "threshold": threshold,
+        "num_perm": num_perm,
+        "lsh_params": lsh_params,
+    }
+    lsh = None
+    seen_paths: set[str] = set()
+    # rensa's LSH only accepts integer keys — lsh_keys[i] is the path inserted
+    # under key i (we only ever test query() for emptiness, so the list just
+    # keeps the ids unique and debuggable).
+    lsh_keys: list[str] = []
+    # Exact-duplicate pre-filter: byte-identical texts (common in DOJ
+    # re-releases) never need the fuzzy LSH path.
+    seen_hashes: dict[str, Path] = {}
+    # Paths already judged duplicates on an earlier run — extract_texts will
+    # happily re-create them from the still-present PDFs.
+    known_dupes: set[str] = set()
+    if cache_path.exists():
         try:
-            text = f.read_text(encoding="utf-8", errors="ignore")
-            if len(text.strip()) < 80:
-                continue
-            m = MinHash(num_perm=num_perm)
-            words = text.lower().split()
-            for j in range(len(words) - 2):
-                m.update(" ".join(words[j : j + 3]).encode())
-            if lsh.query(m):
-                dupes.append(f)
-            else:
-                lsh.insert(str(f), m)
+            state = pickle.loads(cache_path.read_bytes())
+            if state.get("key") == cache_key:
+                lsh = state["lsh"]
+                seen_paths = state["seen_paths"]
+                lsh_keys = state.get("lsh_keys", [])
+                seen_hashes = state["seen_hashes"]
+                known_dupes = state.get("known_dupes", set())
+                print(f"    [dedupe] resuming LSH index ({len(seen_paths)} docs seen)")
         except Exception:
             pass
-        if i % 200 == 0:
-            print(f"    [{i}/{len(files)}] dupes={len(dupes)}")
+
+    files = []
+    for f in all_files:
+        if str(f) in known_dupes:
+            # A removed duplicate re-materialized via re-extraction —
+            # schedule it for removal again instead of letting it rejoin.
+            dupes.append(f)
+        elif str(f) not in seen_paths:
+            files.append(f)
+    seen_paths.update(str(f) for f in files)
+
+    if HAVE_RENSA:
+        # rensa's Rust core makes signature construction cheap — keep it serial.
+        print("    [dedupe] using rensa (Rust MinHash)")
+        if lsh is None:
+            lsh = RMinHashLSH(threshold=threshold, num_perm=num_perm, num_bands=bands)
+        for i, f in enumerate(files, 1):
+            try:
+                text = f.read_text(encoding="utf-8", errors="ignore")
+            except OSError:
+                continue
+            if not text.strip():
+                continue
+            h = hashlib.sha1(text.encode()).hexdigest()
+            if h in seen_hashes:
+                dupes.append(f)
+                continue
+            seen_hashes[h] = f
+            words = _tokens(text)
+            if len(words) >= min_tokens:
+                m = RMinHash(num_perm=num_perm, seed=42)
+                m.update(_trigrams(words))
+                if lsh.query(m):
+                    dupes.append(f)
+                else:
+                    lsh.insert(len(lsh_keys), m)
+                    lsh_keys.append(str(f))
+            if i % 200 == 0:
+                print(f"    [{i}/{len(files)}] dupes={len(dupes)}")
+    else:
+        # Signature building is embarrassingly parallel; only the stateful
+        # LSH insert/query must stay on the main thread.  pool.map yields in
+        # submission order, so first-seen-wins behaviour is unchanged.
+        if lsh is None:
+            lsh = MinHashLSH(threshold=threshold, num_perm=num_perm, params=(bands, rows))
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+            results = pool.map(
+                _minhash_one,
+                (str(f) for f in files),
+                repeat(num_perm),
+                repeat(min_tokens),
+                chunksize=16,
+            )
+            for i, (path, h, sig) in enumerate(results, 1):
+                if h is not None:
+                    if h in seen_hashes:
+                        dupes.append(Path(path))
+                    else:
+                        seen_hashes[h] = Path(path)
+                        if sig is not None:
+                            lean = LeanMinHash.deserialize(sig)
+                            if _lsh_has_any_candidate(lsh, lean):
+                                dupes.append(Path(path))
+                            else:
+                                lsh.insert(path, lean)
+                if i % 200 == 0:
+                    print(f"    [{i}/{len(files)}] dupes={len(dupes)}")
+
+    known_dupes.update(str(d) for d in dupes)
+    try:
+        cache_path.write_bytes(pickle.dumps({
+            "key": cache_key,
+            "lsh": lsh,
+            "seen_paths": seen_paths,
+            "lsh_keys": lsh_keys,
+            "seen_hashes": seen_hashes,
+            "known_dupes": known_dupes,
+        }))
+    except Exception:
+        # e.g. an LSH implementation that doesn't pickle — next run rebuilds.
+        cache_path.unlink(missing_ok=True)
 
     for d in dupes:
         try:
@@ -408,7 +736,7 @@ def deduplicate(txt_dir: Path, threshold: float = 0.95, num_perm: int = 128) ->
         except Exception:
             pass
 
-    unique = len(files) - len(dupes)
+    unique = len(all_files) - len(dupes)
     print(f"    unique={unique}  dupes={len(dupes)}")
     return unique, len(dupes)
 
@@ -420,10 +748,19 @@ def load_manifest(out: Path) -> dict:
 
 
 def save_manifest(out: Path, data: dict) -> None:
-    (out / "manifest.json").write_text(json.dumps(data, indent=2))
+    _write_json_atomic(out / "manifest.json", data)
 
 
 # ── CLI ──────────────────────────────────────────────────────────────────────
+def _parse_lsh_params(value: str) -> tuple[int, int]:
+    """Parse a 'bands,rows' pair for --lsh-params."""
+    try:
+        bands, rows = (int(x) for x in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected B,R (e.g. 32,4), got {value!r}")
+    return bands, rows
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
         prog="scrape",
@@ -444,6 +781,10 @@ examples:
     p.add_argument("--text-only", action="store_true", help="Skip scraping; extract text & dedupe existing PDFs.")
     p.add_argument("--no-dedupe", action="store_true", help="Skip deduplication.")
     p.add_argument("--dedupe-threshold", type=float, default=0.95, help="Similarity threshold (default 0.95).")
+    p.add_argument("--lsh-params", type=_parse_lsh_params, default=LSH_PARAMS_DEFAULT,
+                   metavar="B,R", help="LSH bands,rows (B*R must equal 128; default 32,4).")
+    p.add_argument("--min-tokens", type=int, default=MIN_TOKENS_DEFAULT,
+                   help=f"Docs with fewer tokens skip fuzzy dedupe (default {MIN_TOKENS_DEFAULT}).")
     return p
 
 
@@ -515,7 +856,12 @@ async def run(args: argparse.Namespace) -> None:
         print(f"\n{'─' * 64}")
         print("  DEDUPLICATION")
         print(f"{'─' * 64}")
-        unique, dupes = deduplicate(txt_dir, threshold=args.dedupe_threshold)
+        unique, dupes = deduplicate(
+            txt_dir,
+            threshold=args.dedupe_threshold,
+            lsh_params=args.lsh_params,
+            min_tokens=args.min_tokens,
+        )
     else:
         unique = len(list(txt_dir.glob("*.txt")))
 